@@ -4,8 +4,18 @@ One-time script to scrape Ed forum posts and generate a static website.
 Fetches posts with titles containing "special participation b" and displays them.
 """
 
+import gzip
+import hashlib
+import html
+import json
 import os
+import shutil
+import sqlite3
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
 # Try to load from .env file if python-dotenv is available
@@ -15,8 +25,35 @@ try:
 except ImportError:
     pass  # python-dotenv not installed, skip .env file loading
 
+# lxml parses Ed's XML documents directly; fall back to BeautifulSoup without it
+try:
+    from lxml import etree
+    XML_PARSER = etree.XMLParser(recover=True)
+except ImportError:
+    etree = None
+
+try:
+    from bs4 import BeautifulSoup
+    HAS_BS4 = True
+except ImportError:
+    HAS_BS4 = False
+
+# requests-cache is optional and only used when ED_CACHE is set
+try:
+    from requests_cache import CachedSession
+except ImportError:
+    CachedSession = None
+
+# Brotli is optional; without it only the .gz variant is written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 try:
     from edapi import EdAPI
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     print("❌ Error: edapi is not installed. Please run: pip install -r requirements.txt")
     exit(1)
@@ -38,36 +75,247 @@ TITLE_FILTER = "special participation b"
 # Output directory for the static website
 OUTPUT_DIR = "output"
 
+# Number of thread detail requests kept in flight at once (ED_FETCH_WORKERS
+# overrides it; lower it if Ed starts rate-limiting)
+DETAIL_FETCH_WORKERS = 16
+try:
+    DETAIL_FETCH_WORKERS = max(1, int(os.getenv('ED_FETCH_WORKERS', DETAIL_FETCH_WORKERS)))
+except ValueError:
+    print(f"⚠️  ED_FETCH_WORKERS must be a whole number; using {DETAIL_FETCH_WORKERS}")
+
+# Extra attempts for an Ed API request that fails transiently (connection
+# errors, 429 and 5xx), with exponential backoff; 0 disables retrying
+REQUEST_RETRIES = 2
+REQUEST_BACKOFF_SECONDS = 0.5
+
+# Full thread details are kept here between runs and reused while a
+# thread's updated_at is unchanged. Set to None to always re-fetch.
+THREAD_CACHE_PATH = ".thread_cache.sqlite"
+
+# Set ED_CACHE=1 to cache Ed API responses on disk while iterating on the
+# site (requires: pip install requests-cache). Leave unset for fresh data.
+USE_RESPONSE_CACHE = bool(os.getenv('ED_CACHE'))
+RESPONSE_CACHE_NAME = ".ed_cache"
+RESPONSE_CACHE_EXPIRE_SECONDS = 3600
+
 # ============================================================================
 # END CONFIGURATION
 # ============================================================================
 
 
+# Display format for post and generation dates
+DATE_FORMAT = '%B %d, %Y at %I:%M %p'
+
+# datetime.fromisoformat accepts a trailing 'Z' from Python 3.11 onwards
+FROMISOFORMAT_HANDLES_Z = sys.version_info >= (3, 11)
+
+# Read size used when streaming generated files through a compressor
+COPY_CHUNK_SIZE = 64 * 1024
+
+# Buffer size for the streamed page, so many small fragment writes reach
+# the OS as a few large ones
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Number of thread listing pages requested at once while paginating
+PAGE_FETCH_WORKERS = 8
+
+# Comment and vote count fields, which can change without updated_at
+# changing; on a thread cache hit these are taken from the current listing
+LISTING_COUNT_KEYS = ('comment_count', 'num_comments', 'vote_count', 'upvotes', 'votes')
+
+
+# Stylesheet written to styles.css alongside the generated page
+STYLES_CSS = """* {
+    margin: 0;
+    padding: 0;
+    box-sizing: border-box;
+}
+
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
+    line-height: 1.6;
+    color: #333;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    padding: 20px;
+    min-height: 100vh;
+}
+
+.container {
+    max-width: 1200px;
+    margin: 0 auto;
+    background: white;
+    padding: 40px;
+    border-radius: 12px;
+    box-shadow: 0 10px 40px rgba(0,0,0,0.2);
+}
+
+h1 {
+    color: #2c3e50;
+    margin-bottom: 10px;
+    border-bottom: 3px solid #667eea;
+    padding-bottom: 15px;
+    font-size: 2.5em;
+}
+
+.meta {
+    color: #7f8c8d;
+    margin-bottom: 30px;
+    font-size: 14px;
+    padding: 10px;
+    background: #f8f9fa;
+    border-radius: 6px;
+}
+
+.post {
+    margin-bottom: 40px;
+    padding: 30px;
+    background: #fafafa;
+    border-left: 5px solid #667eea;
+    border-radius: 8px;
+    transition: transform 0.2s, box-shadow 0.2s;
+    box-shadow: 0 2px 8px rgba(0,0,0,0.1);
+}
+
+.post:hover {
+    transform: translateY(-3px);
+    box-shadow: 0 6px 20px rgba(0,0,0,0.15);
+}
+
+.post-title {
+    font-size: 26px;
+    color: #2c3e50;
+    margin-bottom: 15px;
+    font-weight: 600;
+    line-height: 1.3;
+}
+
+.post-meta {
+    color: #7f8c8d;
+    font-size: 14px;
+    margin-bottom: 20px;
+    display: flex;
+    gap: 20px;
+    flex-wrap: wrap;
+    padding-bottom: 15px;
+    border-bottom: 1px solid #e0e0e0;
+}
+
+.post-meta span {
+    display: flex;
+    align-items: center;
+    gap: 5px;
+}
+
+.post-content {
+    color: #555;
+    line-height: 1.8;
+    margin-top: 15px;
+    white-space: pre-wrap;
+    word-wrap: break-word;
+    font-size: 16px;
+}
+
+.post-content p {
+    margin-bottom: 12px;
+}
+
+.stats {
+    display: flex;
+    gap: 20px;
+    margin-top: 20px;
+    padding-top: 15px;
+    border-top: 1px solid #e0e0e0;
+    font-size: 14px;
+    color: #7f8c8d;
+}
+
+.stats span {
+    display: flex;
+    align-items: center;
+    gap: 5px;
+}
+
+.no-posts {
+    text-align: center;
+    padding: 80px 20px;
+    color: #7f8c8d;
+}
+
+.no-posts h2 {
+    margin-bottom: 15px;
+    color: #2c3e50;
+    font-size: 2em;
+}
+
+.no-posts p {
+    font-size: 1.1em;
+}
+"""
+
+
+# Static parts of index.html; only the meta line and the posts are generated
+PAGE_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Special Participation B Posts</title>
+    <link rel="stylesheet" href="styles.css">
+</head>
+<body>
+    <div class="container">
+        <h1>Special Participation B Posts</h1>
+"""
+
+NO_POSTS_HTML = """
+        <div class="no-posts">
+            <h2>No posts found</h2>
+            <p>No posts with titles containing "special participation b" were found.</p>
+        </div>
+"""
+
+PAGE_FOOT = """
+    </div>
+</body>
+</html>
+"""
+
+
 def escape_html(text):
     """Escape HTML special characters."""
     if not text:
         return ""
-    return (str(text)
-            .replace('&', '&amp;')
-            .replace('<', '&lt;')
-            .replace('>', '&gt;')
-            .replace('"', '&quot;')
-            .replace("'", '&#x27;'))
+    if type(text) is not str:
+        text = str(text)
+    # html.escape uses chained C-level replaces and emits &#x27; for '
+    return html.escape(text, quote=True)
 
 
 def format_date(date_str):
     """Format ISO date string to readable format."""
     if not date_str:
         return "Unknown date"
+    if isinstance(date_str, str):
+        return format_iso_date(date_str)
+    return str(date_str)
+
+
+@lru_cache(maxsize=16384)
+def format_iso_date(date_str):
+    """Format an ISO date string, cached since timestamps repeat across threads."""
     try:
-        if isinstance(date_str, str):
-            # Handle ISO format with or without timezone
-            date_str = date_str.replace('Z', '+00:00')
-            dt = datetime.fromisoformat(date_str)
-            return dt.strftime('%B %d, %Y at %I:%M %p')
+        # Handle ISO format with or without timezone
+        if not FROMISOFORMAT_HANDLES_Z and date_str.endswith('Z'):
+            date_str = date_str[:-1] + '+00:00'
+        dt = datetime.fromisoformat(date_str)
+        return dt.strftime(DATE_FORMAT)
     except Exception:
-        pass
-    return str(date_str)
+        return date_str
+
+
+# Parsed document text keyed by content digest, bounded LRU
+PARSE_CACHE_SIZE = 2048
+_parse_cache = OrderedDict()
 
 
 def parse_thread_content(content):
@@ -75,15 +323,202 @@ def parse_thread_content(content):
     if not content:
         return ""
     
+    # Plain text with no markup has nothing to parse
+    if isinstance(content, str) and '<' not in content:
+        return content
+    
+    # Identical documents (e.g. quoted or templated posts) are parsed only once
+    key = None
+    if isinstance(content, str):
+        key = hashlib.blake2b(content.encode('utf-8', 'ignore'), digest_size=16).digest()
+        cached = _parse_cache.get(key)
+        if cached is not None:
+            _parse_cache.move_to_end(key)
+            return cached
+    
     try:
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(content, 'xml')
-        # Extract text from the document, preserving some structure
-        text = soup.get_text(separator='\n', strip=True)
-        return text
+        if etree is not None:
+            data = content.encode('utf-8') if isinstance(content, str) else content
+            root = etree.fromstring(data, XML_PARSER)
+            # Same output as BeautifulSoup's get_text(separator='\n', strip=True)
+            parts = (part.strip() for part in root.itertext()) if root is not None else ()
+            text = '\n'.join(part for part in parts if part)
+        elif HAS_BS4:
+            soup = BeautifulSoup(content, 'xml')
+            # Extract text from the document, preserving some structure
+            text = soup.get_text(separator='\n', strip=True)
+        else:
+            text = str(content)
     except Exception:
         # If parsing fails, return as-is
-        return str(content)
+        text = str(content)
+    
+    if key is not None:
+        _parse_cache[key] = text
+        if len(_parse_cache) > PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return text
+
+
+def open_thread_cache(path):
+    """Open (creating if needed) the on-disk cache of full thread details."""
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS threads "
+            "(id INTEGER PRIMARY KEY, updated_at TEXT, payload TEXT)"
+        )
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+def fetch_thread_details(ed, threads, cache_path=None):
+    """
+    Fetch full details for each thread, with requests issued concurrently.
+    
+    Args:
+        ed: Logged-in EdAPI instance
+        threads: List of basic thread dictionaries from the thread listing
+        cache_path: Optional SQLite file of previously fetched details; threads
+            whose updated_at matches the cached copy are not re-fetched
+    
+    Returns:
+        List of detailed thread dictionaries, in the same order as threads
+    """
+    def fetch(thread):
+        thread_id = thread.get('id')
+        if not thread_id:
+            return None
+        try:
+            # Get full thread details; transient failures were already
+            # retried by the session's adapter
+            return ed.get_thread(thread_id=thread_id)
+        except Exception as e:
+            print(f"⚠️  Error fetching thread {thread_id}: {e}")
+            # Fall back to basic thread info
+            return thread
+    
+    # The cache is only an optimization; if SQLite fails, fetch everything
+    cache = None
+    if cache_path:
+        try:
+            cache = open_thread_cache(cache_path)
+        except sqlite3.Error as e:
+            print(f"⚠️  Thread cache {cache_path} unavailable, fetching all threads: {e}")
+    
+    try:
+        results = [None] * len(threads)
+        misses = []
+        for i, thread in enumerate(threads):
+            row = None
+            if cache is not None and thread.get('id') and thread.get('updated_at'):
+                try:
+                    row = cache.execute(
+                        "SELECT payload FROM threads WHERE id = ? AND updated_at = ?",
+                        (thread['id'], thread['updated_at'])
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"⚠️  Could not read thread cache {cache_path}, fetching all threads: {e}")
+                    cache.close()
+                    cache = None
+            if row:
+                # Votes and replies don't bump updated_at, so take the counts
+                # from the fresh listing entry rather than the cached payload
+                cached = json.loads(row[0])
+                cached.update((key, thread[key]) for key in LISTING_COUNT_KEYS if key in thread)
+                results[i] = cached
+            else:
+                misses.append(i)
+        
+        if cache is not None:
+            print(f"   {len(threads) - len(misses)} unchanged threads loaded from {cache_path}")
+        
+        # Only threads that are new or changed since the last run hit the network
+        with ThreadPoolExecutor(max_workers=DETAIL_FETCH_WORKERS) as executor:
+            fetched = executor.map(fetch, [threads[i] for i in misses])
+            for i, full_thread in zip(misses, fetched):
+                results[i] = full_thread
+        
+        if cache is not None:
+            try:
+                with cache:
+                    for i in misses:
+                        thread, full_thread = threads[i], results[i]
+                        # Fallbacks to the basic listing entry are not worth keeping
+                        if full_thread and full_thread is not thread and thread.get('updated_at'):
+                            cache.execute(
+                                "INSERT OR REPLACE INTO threads (id, updated_at, payload) VALUES (?, ?, ?)",
+                                (thread['id'], thread['updated_at'], json.dumps(full_thread, default=str))
+                            )
+            except sqlite3.Error as e:
+                print(f"⚠️  Could not update thread cache {cache_path}: {e}")
+    finally:
+        if cache is not None:
+            cache.close()
+    
+    return [thread for thread in results if thread]
+
+
+def read_text_if_exists(path):
+    """Return the contents of a text file, or None if it does not exist."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def remove_if_exists(path):
+    """Delete a file, ignoring it if it is already gone."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def precompressed_paths(path):
+    """Return the precompressed sibling paths precompress_file writes for a file."""
+    paths = [path + '.gz']
+    if brotli is not None:
+        paths.append(path + '.br')
+    return paths
+
+
+def has_precompressed(path):
+    """Return True if every precompressed sibling of a file exists."""
+    return all(os.path.exists(variant) for variant in precompressed_paths(path))
+
+
+def precompress_file(path):
+    """
+    Write precompressed .gz (and .br, if brotli is installed) siblings of a file.
+    
+    Static hosts can serve these directly instead of compressing per request.
+    Each sibling is written to a temp file and moved into place, so it only
+    exists once it is complete.
+    
+    Args:
+        path: Path of the uncompressed file
+    """
+    tmp_path = path + '.precompress.tmp'
+    try:
+        # GzipFile keeps the original file name in the header, as gzip.open did
+        with open(path, 'rb') as src, open(tmp_path, 'wb') as raw, \
+                gzip.GzipFile(os.path.basename(path), 'wb', 9, raw) as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, path + '.gz')
+        
+        if brotli is not None:
+            compressor = brotli.Compressor(quality=11)
+            with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b''):
+                    dst.write(compressor.process(chunk))
+                dst.write(compressor.finish())
+            os.replace(tmp_path, path + '.br')
+    finally:
+        remove_if_exists(tmp_path)
 
 
 def generate_static_website(threads, output_dir="output"):
@@ -96,187 +531,82 @@ def generate_static_website(threads, output_dir="output"):
     """
     os.makedirs(output_dir, exist_ok=True)
     
-    # Generate main index page
-    html_content = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Special Participation B Posts</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
-            line-height: 1.6;
-            color: #333;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            padding: 20px;
-            min-height: 100vh;
-        }}
-        
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background: white;
-            padding: 40px;
-            border-radius: 12px;
-            box-shadow: 0 10px 40px rgba(0,0,0,0.2);
-        }}
-        
-        h1 {{
-            color: #2c3e50;
-            margin-bottom: 10px;
-            border-bottom: 3px solid #667eea;
-            padding-bottom: 15px;
-            font-size: 2.5em;
-        }}
-        
-        .meta {{
-            color: #7f8c8d;
-            margin-bottom: 30px;
-            font-size: 14px;
-            padding: 10px;
-            background: #f8f9fa;
-            border-radius: 6px;
-        }}
-        
-        .post {{
-            margin-bottom: 40px;
-            padding: 30px;
-            background: #fafafa;
-            border-left: 5px solid #667eea;
-            border-radius: 8px;
-            transition: transform 0.2s, box-shadow 0.2s;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-        }}
-        
-        .post:hover {{
-            transform: translateY(-3px);
-            box-shadow: 0 6px 20px rgba(0,0,0,0.15);
-        }}
-        
-        .post-title {{
-            font-size: 26px;
-            color: #2c3e50;
-            margin-bottom: 15px;
-            font-weight: 600;
-            line-height: 1.3;
-        }}
-        
-        .post-meta {{
-            color: #7f8c8d;
-            font-size: 14px;
-            margin-bottom: 20px;
-            display: flex;
-            gap: 20px;
-            flex-wrap: wrap;
-            padding-bottom: 15px;
-            border-bottom: 1px solid #e0e0e0;
-        }}
-        
-        .post-meta span {{
-            display: flex;
-            align-items: center;
-            gap: 5px;
-        }}
-        
-        .post-content {{
-            color: #555;
-            line-height: 1.8;
-            margin-top: 15px;
-            white-space: pre-wrap;
-            word-wrap: break-word;
-            font-size: 16px;
-        }}
-        
-        .post-content p {{
-            margin-bottom: 12px;
-        }}
-        
-        .stats {{
-            display: flex;
-            gap: 20px;
-            margin-top: 20px;
-            padding-top: 15px;
-            border-top: 1px solid #e0e0e0;
-            font-size: 14px;
-            color: #7f8c8d;
-        }}
-        
-        .stats span {{
-            display: flex;
-            align-items: center;
-            gap: 5px;
-        }}
-        
-        .no-posts {{
-            text-align: center;
-            padding: 80px 20px;
-            color: #7f8c8d;
-        }}
-        
-        .no-posts h2 {{
-            margin-bottom: 15px;
-            color: #2c3e50;
-            font-size: 2em;
-        }}
-        
-        .no-posts p {{
-            font-size: 1.1em;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>Special Participation B Posts</h1>
-        <div class="meta">
-            Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')} | 
-            Total Posts: {len(threads)}
-        </div>
-"""
+    # The stylesheet is static, so it lives in its own cacheable file
+    css_path = os.path.join(output_dir, 'styles.css')
+    if read_text_if_exists(css_path) != STYLES_CSS or not has_precompressed(css_path):
+        # Drop the old compressed copies first, so a failed compression is
+        # seen as missing and redone on the next run
+        for variant in precompressed_paths(css_path):
+            remove_if_exists(variant)
+        with open(css_path, 'w', encoding='utf-8') as f:
+            f.write(STYLES_CSS)
+        precompress_file(css_path)
     
-    if not threads:
-        html_content += """
-        <div class="no-posts">
-            <h2>No posts found</h2>
-            <p>No posts with titles containing "special participation b" were found.</p>
-        </div>
-"""
-    else:
-        # Sort threads by created_at (newest first)
-        sorted_threads = sorted(
-            threads,
-            key=lambda x: x.get('created_at', ''),
-            reverse=True
-        )
-        
-        for thread in sorted_threads:
-            title = escape_html(thread.get('title', 'Untitled'))
+    output_path = os.path.join(output_dir, 'index.html')
+    hash_path = os.path.join(output_dir, '.index.html.hash')
+    tmp_path = output_path + '.tmp'
+    
+    # Everything except the "Generated on" timestamp goes into the digest, so
+    # a rerun over the same posts can leave the existing page untouched. The
+    # page is still rendered and streamed to a temp file on every run; only
+    # the replace, hash update and recompression are skipped when unchanged.
+    digest = hashlib.blake2b(digest_size=16)
+    
+    # Write the page straight to disk, one region at a time
+    try:
+        with open(tmp_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            def write(text):
+                # Encode once; the same bytes feed both the file and the digest
+                data = text.encode('utf-8')
+                f.write(data)
+                digest.update(data)
             
-            # Get content - try document first, then content field
-            raw_content = thread.get('document') or thread.get('content') or ''
-            content = parse_thread_content(raw_content)
-            content = escape_html(content)
+            # Generate main index page
+            write(PAGE_HEAD)
+            f.write(f"""        <div class="meta">
+            Generated on {datetime.now().strftime(DATE_FORMAT)} | 
+            Total Posts: {len(threads)}
+        </div>
+""".encode('utf-8'))
             
-            # Get author information
-            author_info = thread.get('user', {})
-            if isinstance(author_info, dict):
-                author = author_info.get('name', author_info.get('username', 'Unknown'))
+            if not threads:
+                write(NO_POSTS_HTML)
             else:
-                author = str(author_info) if author_info else 'Unknown'
-            author = escape_html(author)
-            
-            created = format_date(thread.get('created_at'))
-            updated = format_date(thread.get('updated_at'))
-            comment_count = thread.get('comment_count', 0) or thread.get('num_comments', 0)
-            vote_count = thread.get('vote_count', 0) or thread.get('upvotes', 0) or thread.get('votes', 0)
-            
-            html_content += f"""
+                # Sort threads by created_at (newest first)
+                sorted_threads = sorted(
+                    threads,
+                    key=lambda x: x.get('created_at', ''),
+                    reverse=True
+                )
+                
+                # Bind hot lookups to locals for the per-thread loop
+                esc = escape_html
+                fmt_date = format_date
+                
+                for thread in sorted_threads:
+                    get = thread.get
+                    title = esc(get('title', 'Untitled'))
+                    
+                    # Get content - try document first, then content field
+                    raw_content = get('document') or get('content') or ''
+                    content = esc(parse_thread_content(raw_content))
+                    
+                    # Get author information
+                    author_info = get('user', {})
+                    try:
+                        author = author_info['name']
+                    except KeyError:
+                        author = author_info.get('username', 'Unknown')
+                    except TypeError:
+                        # Not a dict (e.g. a plain username string or None)
+                        author = str(author_info) if author_info else 'Unknown'
+                    author = esc(author)
+                    
+                    created = fmt_date(get('created_at'))
+                    comment_count = get('comment_count') or get('num_comments') or 0
+                    vote_count = get('vote_count') or get('upvotes') or get('votes') or 0
+                    
+                    write(f"""
         <div class="post">
             <div class="post-title">{title}</div>
             <div class="post-meta">
@@ -289,18 +619,29 @@ def generate_static_website(threads, output_dir="output"):
                 <span>👍 {vote_count} votes</span>
             </div>
         </div>
-"""
-    
-    html_content += """
-    </div>
-</body>
-</html>
-"""
+""")
+            
+            write(PAGE_FOOT)
+        
+        content_hash = digest.hexdigest()
+        if (read_text_if_exists(hash_path) == content_hash
+                and os.path.exists(output_path) and has_precompressed(output_path)):
+            print(f"✅ No changes since the last run; kept existing {output_path}")
+            return output_path
+        
+        # Forget the old hash and compressed copies before the page changes,
+        # so an interrupted run is never mistaken for a finished one
+        for stale_path in [hash_path] + precompressed_paths(output_path):
+            remove_if_exists(stale_path)
+        os.replace(tmp_path, output_path)
+    finally:
+        # Never leave a half-written or discarded temp page behind
+        remove_if_exists(tmp_path)
     
-    # Write the HTML file
-    output_path = os.path.join(output_dir, 'index.html')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    precompress_file(output_path)
+    # Written last, so the hash only vouches for a fully regenerated page
+    with open(hash_path, 'w', encoding='utf-8') as f:
+        f.write(content_hash)
     
     print(f"✅ Static website generated successfully at {output_path}")
     return output_path
@@ -326,7 +667,34 @@ def main():
     print("🔐 Authenticating with Ed API...")
     try:
         ed = EdAPI()
+        if USE_RESPONSE_CACHE:
+            if CachedSession is not None:
+                cached_session = CachedSession(
+                    RESPONSE_CACHE_NAME,
+                    expire_after=RESPONSE_CACHE_EXPIRE_SECONDS,
+                    allowable_methods=('GET',),
+                )
+                # EdAPI puts the Authorization header on its own session;
+                # carry it over so login() and every later request still send it
+                cached_session.headers.update(ed.session.headers)
+                ed.session = cached_session
+                print(f"💾 Caching API responses in {RESPONSE_CACHE_NAME}.sqlite")
+            else:
+                print("⚠️  ED_CACHE is set but requests-cache is not installed; not caching")
         ed.login()
+        # Keep one pooled connection per concurrent worker (pagination or
+        # details), and retry only transient failures; errors Ed reports
+        # itself, such as a bad token or a missing thread, fail straight away
+        pool_size = max(PAGE_FETCH_WORKERS, DETAIL_FETCH_WORKERS)
+        retries = Retry(
+            total=max(0, REQUEST_RETRIES),
+            backoff_factor=REQUEST_BACKOFF_SECONDS,
+            status_forcelist=(429, 500, 502, 503, 504),
+            raise_on_status=False,
+        )
+        ed.session.mount('https://', HTTPAdapter(pool_maxsize=pool_size, max_retries=retries))
+        # Send the auth header on every session request instead of per call
+        ed.session.headers.update(ed._auth_header)
         user_info = ed.get_user_info()
         user = user_info.get('user', {})
         print(f"✅ Authenticated as {user.get('name', 'User')}")
@@ -337,7 +705,11 @@ def main():
     
     # Fetch threads with pagination to get ALL threads, not just recent ones
     print(f"📚 Fetching threads from course {COURSE_ID} (with pagination)...")
-    all_threads = []
+    # Filter threads by title as pages arrive, so only matching threads are kept
+    print(f"🔍 Keeping threads with titles containing '{TITLE_FILTER}' (case-insensitive)...")
+    title_filter = TITLE_FILTER.lower()
+    filtered_threads = []
+    total_threads = 0
     page = 0
     page_size = 50
     seen_ids = set()
@@ -346,45 +718,60 @@ def main():
         # Use the session to make direct API calls with pagination
         base_url = "https://us.edstem.org/api/"
         
-        while True:
+        def fetch_page(page_index):
+            """Fetch one page of the thread listing; an empty list means no more pages."""
             # The Ed API uses offset-based pagination
-            offset = page * page_size
+            offset = page_index * page_size
             url = f"{base_url}courses/{COURSE_ID}/threads?limit={page_size}&offset={offset}"
             
-            response = ed.session.get(url, headers=ed._auth_header)
+            response = ed.session.get(url)
             response.raise_for_status()
             data = response.json()
             
             if not isinstance(data, dict):
-                break
+                return []
+            return data.get("threads", [])
+        
+        # Probe the first page on its own (most courses fit in one), then
+        # request pages in concurrent batches until one comes back short
+        batch_size = 1
+        done = False
+        with ThreadPoolExecutor(max_workers=PAGE_FETCH_WORKERS) as executor:
+            while not done:
+                batch = range(page, page + batch_size)
+                for page_threads in executor.map(fetch_page, batch):
+                    if not page_threads:
+                        done = True
+                        break
+                    
+                    # Filter out duplicates
+                    new_threads = [
+                        t for t in page_threads 
+                        if isinstance(t, dict) and t.get("id") not in seen_ids
+                    ]
+                    
+                    for thread in new_threads:
+                        thread_id = thread.get("id")
+                        if thread_id:
+                            seen_ids.add(thread_id)
+                    
+                    total_threads += len(new_threads)
+                    filtered_threads.extend(
+                        t for t in new_threads
+                        if title_filter in (t.get('title') or '').lower()
+                    )
+                    print(f"   Fetched page {page + 1}: {len(new_threads)} threads (total so far: {total_threads})")
+                    
+                    # If we got fewer threads than page_size, we've reached the end
+                    if len(page_threads) < page_size:
+                        done = True
+                        break
+                    
+                    page += 1
                 
-            page_threads = data.get("threads", [])
-            
-            if not page_threads:
-                break
-            
-            # Filter out duplicates
-            new_threads = [
-                t for t in page_threads 
-                if isinstance(t, dict) and t.get("id") not in seen_ids
-            ]
-            
-            for thread in new_threads:
-                thread_id = thread.get("id")
-                if thread_id:
-                    seen_ids.add(thread_id)
-            
-            all_threads.extend(new_threads)
-            print(f"   Fetched page {page + 1}: {len(new_threads)} threads (total so far: {len(all_threads)})")
-            
-            # If we got fewer threads than page_size, we've reached the end
-            if len(page_threads) < page_size:
-                break
-            
-            page += 1
+                batch_size = PAGE_FETCH_WORKERS
         
-        threads = all_threads
-        print(f"✅ Found {len(threads)} total threads (across {page + 1} pages)")
+        print(f"✅ Found {total_threads} total threads (across {page + 1} pages)")
     except Exception as e:
         print(f"⚠️  Error with pagination, falling back to list_threads: {e}")
         try:
@@ -393,13 +780,10 @@ def main():
         except Exception as e2:
             print(f"❌ Error fetching threads: {e2}")
             return
-    
-    # Filter threads by title
-    print(f"🔍 Filtering threads with titles containing '{TITLE_FILTER}' (case-insensitive)...")
-    filtered_threads = [
-        thread for thread in threads
-        if TITLE_FILTER.lower() in thread.get('title', '').lower()
-    ]
+        filtered_threads = [
+            thread for thread in threads
+            if title_filter in (thread.get('title') or '').lower()
+        ]
     
     print(f"✅ Found {len(filtered_threads)} matching posts")
     
@@ -409,19 +793,7 @@ def main():
     
     # Fetch full thread details for each filtered thread
     print("📖 Fetching full thread details...")
-    detailed_threads = []
-    for thread in filtered_threads:
-        try:
-            thread_id = thread.get('id')
-            if thread_id:
-                # Get full thread details
-                full_thread = ed.get_thread(thread_id=thread_id)
-                if full_thread:
-                    detailed_threads.append(full_thread)
-        except Exception as e:
-            print(f"⚠️  Error fetching thread {thread_id}: {e}")
-            # Fall back to basic thread info
-            detailed_threads.append(thread)
+    detailed_threads = fetch_thread_details(ed, filtered_threads, THREAD_CACHE_PATH)
     
     print(f"✅ Retrieved details for {len(detailed_threads)} threads")
     